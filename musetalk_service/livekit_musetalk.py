@@ -4,13 +4,19 @@ Generates lip-synced video from audio in real-time
 """
 
 import asyncio
+import atexit
+import contextlib
 import os
+import sys
+import time
 import numpy as np
 import cv2
+import soundfile as sf
 from pathlib import Path
 from typing import Optional
 import tempfile
 import logging
+from multiprocessing import resource_tracker, shared_memory
 
 from livekit import rtc, api
 from livekit.agents import JobContext, WorkerOptions, cli, JobProcess
@@ -23,6 +29,61 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv(Path(__file__).parent.parent / "python_agent" / ".env.local")
 
+# Idle loop streamed while the agent is not speaking
+IDLE_VIDEO_PATH = str(Path(__file__).parent.parent / "public" / "idle-avatar.mp4")
+
+# Shared-memory header: [ready, num_frames, height, width] as int64, then fps as float64
+IDLE_SHM_HEADER_SIZE = 64
+# How long to wait for another worker to finish publishing the idle frames
+# before treating its segment as abandoned
+IDLE_SHM_READY_TIMEOUT = 5.0
+
+# Decode the idle video on NVDEC when OpenCV is built with CUDA video codecs
+try:
+    CUDA_DECODE_AVAILABLE = (
+        hasattr(cv2, "cudacodec") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+    )
+except cv2.error:
+    CUDA_DECODE_AVAILABLE = False
+
+# Keep per-utterance audio files in RAM (tmpfs) when available
+AUDIO_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+@contextlib.contextmanager
+def untracked_shared_memory():
+    """
+    Keep shared-memory segments opened in this block out of the resource tracker.
+
+    Only the creating worker owns the idle-frames segment. Before Python 3.13,
+    attaching always registered the segment, so the tracker would unlink it
+    when the attaching worker exited; unregistering afterwards is no better,
+    since a tracker shared with the creator would forget the creator's entry
+    too. From 3.13 on, pass track=False instead.
+    """
+    if sys.version_info >= (3, 13):
+        yield
+        return
+
+    register, unregister = resource_tracker.register, resource_tracker.unregister
+
+    def skip_shared_memory(func):
+        def wrapper(name, rtype):
+            if rtype != "shared_memory":
+                func(name, rtype)
+        return wrapper
+
+    resource_tracker.register = skip_shared_memory(register)
+    resource_tracker.unregister = skip_shared_memory(unregister)
+    try:
+        yield
+    finally:
+        resource_tracker.register, resource_tracker.unregister = register, unregister
+
+
+# Attach without registering the segment with this process's resource tracker
+SHM_ATTACH_OPTIONS = {"track": False} if sys.version_info >= (3, 13) else {}
+
 # MuseTalk will be imported after setup
 musetalk_inference = None
 
@@ -46,9 +107,25 @@ class MuseTalkService:
         self.reference_video_path = reference_video_path
         self.reference_frame = None
         self.musetalk = None
+        # Idle loop decoded once into a contiguous (N, H, W, 4) RGBA buffer
+        self.idle_frames: Optional[np.ndarray] = None
+        self.idle_fps = 30.0
+        # Keeps the shared-memory mapping behind idle_frames alive
+        self.idle_shm: Optional[shared_memory.SharedMemory] = None
+        # The worker that created the segment unlinks it on exit
+        self.owns_idle_shm = False
+        self.loaded = False
 
     async def initialize(self):
         """Initialize MuseTalk and load reference video"""
+        # Decoding and model loading block for seconds; keep the event loop free
+        await asyncio.to_thread(self.load)
+
+    def load(self):
+        """Load MuseTalk and the reference video (blocking, safe to call in prewarm)"""
+        if self.loaded:
+            return
+
         logger.info(f"Initializing with reference video: {self.reference_video_path}")
 
         # Load reference video first frame
@@ -59,8 +136,177 @@ class MuseTalkService:
             logger.info(f"Reference frame loaded: {frame.shape}")
         cap.release()
 
+        # Decode the idle loop once (shared across workers) so streaming never
+        # touches the decoder
+        self.load_shared_idle_frames()
+
         # Load MuseTalk model
         self.musetalk = load_musetalk()
+        self.loaded = True
+
+    def load_shared_idle_frames(self):
+        """
+        Attach to the idle frames decoded by another worker, or decode them
+        into a new shared-memory segment so later workers can attach.
+
+        The segment name is derived from the video's size and mtime, so
+        replacing the video creates a fresh segment. The worker that creates
+        the segment owns it and unlinks it on exit; attached workers keep
+        their mapping after that, and new workers publish a fresh segment.
+        """
+        stat = os.stat(self.reference_video_path)
+        shm_name = f"musetalk_idle_{stat.st_size}_{int(stat.st_mtime)}"
+
+        try:
+            with untracked_shared_memory():
+                shm = shared_memory.SharedMemory(name=shm_name, **SHM_ATTACH_OPTIONS)
+        except FileNotFoundError:
+            pass
+        else:
+            header = np.ndarray((4,), dtype=np.int64, buffer=shm.buf)
+            # The creator decodes before creating the segment, so it only has
+            # the copy left to do
+            deadline = time.monotonic() + IDLE_SHM_READY_TIMEOUT
+            while not header[0] and time.monotonic() < deadline:
+                time.sleep(0.05)
+            if header[0]:
+                num_frames, height, width = (int(v) for v in header[1:4])
+                self.idle_fps = float(
+                    np.ndarray((1,), dtype=np.float64, buffer=shm.buf, offset=32)[0]
+                )
+                self.idle_frames = np.ndarray(
+                    (num_frames, height, width, 4),
+                    dtype=np.uint8,
+                    buffer=shm.buf,
+                    offset=IDLE_SHM_HEADER_SIZE,
+                )
+                self.idle_shm = shm
+                logger.info(f"Attached to shared idle frames: {shm_name}")
+                return
+            # The creator died before publishing; replace its segment
+            logger.warning(f"Removing unpublished shared idle frames: {shm_name}")
+            del header
+            with untracked_shared_memory():
+                with contextlib.suppress(FileNotFoundError):
+                    shm.unlink()
+            shm.close()
+
+        frames, fps = self.load_idle_frames(self.reference_video_path)
+        try:
+            shm = shared_memory.SharedMemory(
+                name=shm_name,
+                create=True,
+                size=IDLE_SHM_HEADER_SIZE + frames.nbytes,
+            )
+        except FileExistsError:
+            # Lost the race to another worker; keep the private copy
+            self.idle_frames, self.idle_fps = frames, fps
+            return
+        self.owns_idle_shm = True
+        atexit.register(self.release_idle_frames)
+
+        shared = np.ndarray(
+            frames.shape, dtype=np.uint8, buffer=shm.buf, offset=IDLE_SHM_HEADER_SIZE
+        )
+        shared[:] = frames
+        np.ndarray((1,), dtype=np.float64, buffer=shm.buf, offset=32)[0] = fps
+        header = np.ndarray((4,), dtype=np.int64, buffer=shm.buf)
+        header[1:4] = frames.shape[:3]
+        # Publish last so attaching workers never see a half-written buffer
+        header[0] = 1
+
+        self.idle_frames, self.idle_fps, self.idle_shm = shared, fps, shm
+        logger.info(f"Published idle frames to shared memory: {shm_name}")
+
+    def release_idle_frames(self):
+        """Unlink the shared idle frames if this worker created them"""
+        if not self.owns_idle_shm:
+            return
+        self.owns_idle_shm = False
+        # Already unlinked if a later worker found it unpublished
+        with contextlib.suppress(FileNotFoundError):
+            self.idle_shm.unlink()
+
+    @staticmethod
+    def load_idle_frames(video_path: str) -> tuple[np.ndarray, float]:
+        """
+        Decode every frame of a short video into a preallocated RGBA buffer
+
+        Args:
+            video_path: Path to the idle video
+
+        Returns:
+            (frames, fps) where frames is a contiguous (N, H, W, 4) uint8 array
+        """
+        # Prefer hardware decode (VAAPI, D3D11, ...); OpenCV falls back to software
+        cap = cv2.VideoCapture(
+            video_path,
+            cv2.CAP_FFMPEG,
+            [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY],
+        )
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # Frame count is only an estimate for some containers, so grow if needed
+        capacity = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 1)
+        frames = np.empty((capacity, height, width, 4), dtype=np.uint8)
+
+        count = 0
+        decoder = "NVDEC"
+        if CUDA_DECODE_AVAILABLE:
+            try:
+                frames, count = MuseTalkService._decode_frames_cuda(video_path, frames)
+            except cv2.error as e:
+                logger.warning(f"CUDA decode failed, falling back to FFmpeg: {e}")
+                count = 0
+        if count == 0:
+            decoder = "FFmpeg"
+            frames, count = MuseTalkService._decode_frames_cpu(cap, frames)
+        cap.release()
+
+        if count == 0:
+            raise RuntimeError(f"Could not decode any frames from {video_path}")
+
+        logger.info(f"Idle video cached ({decoder}): {count} frames at {fps:.1f} FPS")
+        return frames[:count], fps
+
+    @staticmethod
+    def _decode_frames_cpu(
+        cap: cv2.VideoCapture, frames: np.ndarray
+    ) -> tuple[np.ndarray, int]:
+        """Decode with VideoCapture, converting BGR to RGBA into the frame buffer"""
+        count = 0
+        # Reuse one BGR scratch image across retrieve() calls; cvtColor then
+        # writes straight into the cached RGBA slot, with no tobytes() copy
+        frame = None
+        while cap.grab():
+            ret, frame = cap.retrieve(frame)
+            if not ret:
+                break
+            if count == len(frames):
+                frames = np.concatenate([frames, np.empty_like(frames)])
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=frames[count])
+            count += 1
+        return frames, count
+
+    @staticmethod
+    def _decode_frames_cuda(video_path: str, frames: np.ndarray) -> tuple[np.ndarray, int]:
+        """Decode on NVDEC, converting on the GPU and downloading into the frame buffer"""
+        reader = cv2.cudacodec.createVideoReader(video_path)
+        gpu_rgba = cv2.cuda_GpuMat()
+
+        count = 0
+        while True:
+            ret, gpu_frame = reader.nextFrame()
+            if not ret:
+                break
+            if count == len(frames):
+                frames = np.concatenate([frames, np.empty_like(frames)])
+            # cudacodec decodes to BGRA
+            cv2.cuda.cvtColor(gpu_frame, cv2.COLOR_BGRA2RGBA, gpu_rgba)
+            gpu_rgba.download(frames[count])
+            count += 1
+        return frames, count
 
     async def generate_video_from_audio(
         self,
@@ -71,22 +317,22 @@ class MuseTalkService:
         Generate lip-synced video frames from audio
 
         Args:
-            audio_data: Raw audio bytes
+            audio_data: Raw 16-bit mono PCM audio bytes
             sample_rate: Audio sample rate
 
         Returns:
             numpy array of video frames
         """
-        if self.musetalk is None:
+        if not self.loaded:
             await self.initialize()
 
         # Save audio to temp file (MuseTalk expects file input)
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            audio_path = f.name
-            # Convert audio_data to WAV format
-            # TODO: Use soundfile or pydub to save properly
-
+        fd, audio_path = tempfile.mkstemp(suffix=".wav", dir=AUDIO_TMP_DIR)
         try:
+            with os.fdopen(fd, "wb") as f:
+                samples = np.frombuffer(audio_data, dtype=np.int16)
+                sf.write(f, samples, sample_rate, format="WAV", subtype="PCM_16")
+
             # Run MuseTalk inference
             # TODO: Call MuseTalk with reference frame and audio
             # video_frames = self.musetalk.inference(
@@ -94,8 +340,11 @@ class MuseTalkService:
             #     audio_path=audio_path
             # )
 
-            # Placeholder: return reference frame repeated
-            video_frames = np.array([self.reference_frame] * 10)
+            # Placeholder: return reference frame repeated as a zero-copy
+            # read-only view (use np.ascontiguousarray before mutating)
+            video_frames = np.broadcast_to(
+                self.reference_frame, (10, *self.reference_frame.shape)
+            )
 
             return video_frames
 
@@ -105,17 +354,23 @@ class MuseTalkService:
                 os.unlink(audio_path)
 
 
+def prewarm(proc: JobProcess):
+    """Load models and decode the idle video before any room is assigned"""
+    musetalk_service = MuseTalkService(IDLE_VIDEO_PATH)
+    musetalk_service.load()
+    proc.userdata["musetalk_service"] = musetalk_service
+
+
 async def entrypoint(ctx: JobContext):
     """Main entry point for LiveKit agent"""
 
     logger.info("MuseTalk agent started")
 
-    # Path to idle video
-    idle_video_path = str(Path(__file__).parent.parent / "public" / "idle-avatar.mp4")
-
-    # Initialize MuseTalk service
-    musetalk_service = MuseTalkService(idle_video_path)
-    await musetalk_service.initialize()
+    # Reuse the service loaded in prewarm so the first request pays no load cost
+    musetalk_service = ctx.proc.userdata.get("musetalk_service")
+    if musetalk_service is None:
+        musetalk_service = MuseTalkService(IDLE_VIDEO_PATH)
+        await musetalk_service.initialize()
 
     # Connect to room
     await ctx.connect()
@@ -133,32 +388,48 @@ async def entrypoint(ctx: JobContext):
     # Play idle video loop in background
     async def stream_idle_video():
         """Stream idle video when not speaking"""
-        cap = cv2.VideoCapture(idle_video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_duration = 1.0 / fps
+        # One contiguous (N, H, W, 4) backing store: frames[idx] is a strided
+        # view, so switching frames moves no data until the single copy below
+        frames = musetalk_service.idle_frames
+        assert frames.flags.c_contiguous
+        num_frames, height, width, _ = frames.shape
+        frame_duration = 1.0 / musetalk_service.idle_fps
+        idx = 0
+
+        # One frame whose buffer is reused every tick (capture_frame copies it
+        # synchronously, so it is safe to overwrite afterwards)
+        video_frame = rtc.VideoFrame(
+            width=width,
+            height=height,
+            type=rtc.VideoBufferType.RGBA,
+            data=bytearray(frames[0].nbytes),
+        )
+        frame_buffer = np.frombuffer(video_frame.data, dtype=np.uint8).reshape(
+            height, width, 4
+        )
+
+        # Pace against a monotonic deadline so processing time doesn't accumulate
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
 
         while True:
-            ret, frame = cap.read()
-            if not ret:
-                # Loop back to start
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                continue
-
-            # Convert BGR to RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Create video frame
-            video_frame = rtc.VideoFrame(
-                width=frame_rgb.shape[1],
-                height=frame_rgb.shape[0],
-                type=rtc.VideoBufferType.RGBA,
-                data=frame_rgb.tobytes()
-            )
+            # Frames are already decoded to RGBA, so this is a single memcpy
+            np.copyto(frame_buffer, frames[idx])
 
             # Capture frame to source
             video_source.capture_frame(video_frame)
 
-            await asyncio.sleep(frame_duration)
+            next_tick += frame_duration
+            delay = next_tick - loop.time()
+            if delay < -frame_duration:
+                # Fell behind by whole frames: skip them to stay in sync with wall clock
+                missed = int(-delay / frame_duration)
+                idx += missed
+                next_tick += missed * frame_duration
+                delay += missed * frame_duration
+            idx = (idx + 1) % num_frames
+
+            await asyncio.sleep(max(0.0, delay))
 
     # Start idle video streaming
     idle_task = asyncio.create_task(stream_idle_video())
@@ -186,6 +457,7 @@ if __name__ == "__main__":
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
             request_fnc=JobProcess.accept_if_room_prefix("voice-chat-"),
         ),
     )
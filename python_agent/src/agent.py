@@ -1,6 +1,7 @@
 import asyncio
 import json
 import logging
+import re
 import time
 from typing import TYPE_CHECKING, Optional
 
@@ -20,7 +21,16 @@ from livekit.agents import (
 from livekit.plugins import noise_cancellation, silero
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
-from emotion_analyzer import analyze_emotion
+# orjson serializes much faster than stdlib json; fall back if not installed
+try:
+    import orjson
+
+    def dumps_json(data: dict) -> str:
+        return orjson.dumps(data).decode()
+except ImportError:
+    dumps_json = json.dumps
+
+from emotion_analyzer import analyze_emotion_lower_async
 
 logger = logging.getLogger("agent")
 
@@ -55,6 +65,41 @@ class Assistant(Agent):
     #     return "sunny with a temperature of 70 degrees."
 
 
+# Explicit emotion commands like 'act happy' or 'be sad', one named group per emotion
+EMOTION_COMMANDS = {
+    "happy": ("act happy", "be happy", "show happy"),
+    "sad": ("act sad", "be sad", "show sad"),
+    "angry": ("act angry", "be angry", "show angry"),
+    "surprised": ("act surprised", "be surprised", "show surprised"),
+    "idle": ("act thinking", "be thoughtful", "show thinking", "act idle"),
+    "neutral": ("act neutral", "be neutral", "show neutral", "reset"),
+}
+_EMOTION_COMMAND_RE = re.compile(
+    "|".join(
+        rf"\b(?P<{emotion}>{'|'.join(map(re.escape, phrases))})\b"
+        for emotion, phrases in EMOTION_COMMANDS.items()
+    ),
+    re.IGNORECASE,
+)
+_EMOTION_COMMAND_PRIORITY = {emotion: i for i, emotion in enumerate(EMOTION_COMMANDS)}
+
+
+def detect_emotion_command(text_lower: str) -> Optional[str]:
+    """Detect explicit emotion commands like 'act happy' or 'be sad' in lowercased text.
+
+    When several commands appear, the one listed first in EMOTION_COMMANDS wins,
+    regardless of where it occurs in the text.
+    """
+    best = None
+    for match in _EMOTION_COMMAND_RE.finditer(text_lower):
+        emotion = match.lastgroup
+        if best is None or _EMOTION_COMMAND_PRIORITY[emotion] < _EMOTION_COMMAND_PRIORITY[best]:
+            best = emotion
+            if _EMOTION_COMMAND_PRIORITY[best] == 0:
+                break  # Nothing outranks the first emotion
+    return best
+
+
 server = AgentServer()
 
 
@@ -65,22 +110,45 @@ def prewarm(proc: JobProcess):
 server.setup_fnc = prewarm
 
 
+# Last (emotion, text snippet) sent per room and when; identical payloads are
+# only re-sent after EMOTION_REFRESH_INTERVAL seconds so late-joining clients
+# still get them. The snippet is part of the key because the frontend runs its
+# own classifier on the text.
+EMOTION_REFRESH_INTERVAL = 30.0
+_last_emotion: dict[str, tuple[str, str, float]] = {}
+
+
 async def send_emotion_data(room: rtc.Room, emotion: str, source: str, text: str):
     """Send emotion data to the frontend via participant attributes."""
+    # Slice the snippet once; logging truncates lazily with %.50s
+    snippet = text[:100]
+
+    # Skip the signalling round-trip when nothing changed
+    now = time.monotonic()
+    last = _last_emotion.get(room.name)
+    if (
+        last is not None
+        and last[:2] == (emotion, snippet)
+        and now - last[2] < EMOTION_REFRESH_INTERVAL
+    ):
+        logger.debug("Emotion unchanged, skipping attribute update: %s", emotion)
+        return
+
     data = {
         "type": "emotion",
         "emotion": emotion,
         "source": source,  # "user" or "agent"
-        "text": text[:100],  # Send snippet of text for debugging
+        "text": snippet,  # Send snippet of text for debugging
         # Send timestamp in milliseconds (JS Date expects ms)
-        "timestamp": int(time.time() * 1000),
+        "timestamp": time.time_ns() // 1_000_000,
         "confidence": 1.0,  # Add confidence field
     }
 
     # Send via participant attributes (not data channel)
-    emotion_json = json.dumps(data)
+    emotion_json = dumps_json(data)
     await room.local_participant.set_attributes({"emotion": emotion_json})
-    logger.info(f"📤 Sent emotion via attributes: {emotion} ({source}) - {text[:50]}")
+    _last_emotion[room.name] = (emotion, snippet, now)
+    logger.info("📤 Sent emotion via attributes: %s (%s) - %.50s", emotion, source, snippet)
 
 
 @server.rtc_session()
@@ -116,25 +184,53 @@ async def my_agent(ctx: JobContext):
     # Set up emotion analysis hooks - listen on conversation items
     logger.info("Setting up emotion analysis hooks...")
 
-    def detect_emotion_command(text: str) -> Optional[str]:
-        """Detect explicit emotion commands like 'act happy' or 'be sad'."""
-        text_lower = text.lower()
-
-        # Direct commands
-        if "act happy" in text_lower or "be happy" in text_lower or "show happy" in text_lower:
-            return "happy"
-        elif "act sad" in text_lower or "be sad" in text_lower or "show sad" in text_lower:
-            return "sad"
-        elif "act angry" in text_lower or "be angry" in text_lower or "show angry" in text_lower:
-            return "angry"
-        elif "act surprised" in text_lower or "be surprised" in text_lower or "show surprised" in text_lower:
-            return "surprised"
-        elif "act thinking" in text_lower or "be thoughtful" in text_lower or "show thinking" in text_lower or "act idle" in text_lower:
-            return "idle"
-        elif "act neutral" in text_lower or "be neutral" in text_lower or "show neutral" in text_lower or "reset" in text_lower:
-            return "neutral"
-
-        return None
+    # Emotions are sent in order by one long-lived task fed from a small queue,
+    # instead of allocating a task per conversation item
+    emotion_queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+
+    async def emotion_sender():
+        while True:
+            emotion, source, text, text_lower = await emotion_queue.get()
+            try:
+                if emotion is None:
+                    # Sentiment analysis runs off the event loop
+                    emotion = await analyze_emotion_lower_async(text_lower)
+                    logger.info("🎭 Agent's REACTION emotion: %s", emotion)
+                await send_emotion_data(ctx.room, emotion, source, text)
+            except Exception:
+                logger.exception("❌ Failed to send emotion")
+
+    def queue_emotion(
+        emotion: Optional[str], source: str, text: str, text_lower: str = ""
+    ):
+        """
+        Queue an emotion for the sender task.
+
+        Pass emotion=None to have the sender analyze text_lower first. Such a
+        sentiment item replaces any still-pending one, so a burst of messages
+        is only analyzed for the latest; explicit emotions are never dropped
+        in its favour.
+        """
+        if emotion is None:
+            pending = []
+            while not emotion_queue.empty():
+                item = emotion_queue.get_nowait()
+                if item[0] is not None:
+                    pending.append(item)
+            for item in pending:
+                emotion_queue.put_nowait(item)
+
+        if emotion_queue.full():
+            emotion_queue.get_nowait()  # Drop the oldest
+        emotion_queue.put_nowait((emotion, source, text, text_lower))
+
+    emotion_sender_task = asyncio.create_task(emotion_sender())
+
+    async def stop_emotion_sender():
+        emotion_sender_task.cancel()
+        _last_emotion.pop(ctx.room.name, None)
+
+    ctx.add_shutdown_callback(stop_emotion_sender)
 
     @session.on("conversation_item_added")
     def on_conversation_item(event):
@@ -150,7 +246,7 @@ async def my_agent(ctx: JobContext):
         # ONLY analyze user messages - skip agent's own responses
         # The emoji represents the agent's REACTION to what the user says
         if role == "assistant":
-            logger.debug(f"⏭️  Skipping agent's own message (not analyzing)")
+            logger.debug("⏭️  Skipping agent's own message (not analyzing)")
             return
 
         # message.content can be a list or a string
@@ -161,21 +257,22 @@ async def my_agent(ctx: JobContext):
         else:
             transcript = str(content)
 
-        logger.info(f"🎭 USER said: {transcript[:50]}")
+        logger.info("🎭 USER said: %.50s", transcript)
 
         if transcript.strip():
+            # Lowercase once and share it between the command and sentiment passes
+            text_lower = transcript.lower()
+
             # First check for explicit emotion commands
-            commanded_emotion = detect_emotion_command(transcript)
+            commanded_emotion = detect_emotion_command(text_lower)
 
             if commanded_emotion:
-                logger.info(f"🎭 COMMAND DETECTED: {commanded_emotion}")
-                asyncio.create_task(send_emotion_data(ctx.room, commanded_emotion, "agent", transcript))
+                logger.info("🎭 COMMAND DETECTED: %s", commanded_emotion)
+                queue_emotion(commanded_emotion, "agent", transcript)
             else:
-                # Otherwise use sentiment analysis
-                emotion = analyze_emotion(transcript)
-                logger.info(f"🎭 Agent's REACTION emotion: {emotion}")
+                # Otherwise use sentiment analysis (done by the sender, off-loop)
                 # Send emotion as 'agent' source - this is the agent's face reacting to user
-                asyncio.create_task(send_emotion_data(ctx.room, emotion, "agent", transcript))
+                queue_emotion(None, "agent", transcript, text_lower)
 
     logger.info("✅ Emotion hooks registered")
 
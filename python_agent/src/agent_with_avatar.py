@@ -22,6 +22,15 @@ from livekit.agents import (
 from livekit.plugins import noise_cancellation, silero
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+# orjson serializes much faster than stdlib json; fall back if not installed
+try:
+    import orjson
+
+    def dumps_json(data: dict) -> str:
+        return orjson.dumps(data).decode()
+except ImportError:
+    dumps_json = json.dumps
+
 # Import avatar plugin
 try:
     from livekit.plugins import bithuman
@@ -30,7 +39,7 @@ except ImportError:
     AVATAR_AVAILABLE = False
     print("⚠️  BitHuman plugin not installed. Run: uv add 'livekit-agents[bithuman]~=1.3'")
 
-from emotion_analyzer import analyze_emotion
+from emotion_analyzer import analyze_emotion_lower_async
 
 logger = logging.getLogger("agent")
 
@@ -58,22 +67,45 @@ def prewarm(proc: JobProcess):
 server.setup_fnc = prewarm
 
 
+# Last (emotion, text snippet) sent per room and when; identical payloads are
+# only re-sent after EMOTION_REFRESH_INTERVAL seconds so late-joining clients
+# still get them. The snippet is part of the key because the frontend runs its
+# own classifier on the text.
+EMOTION_REFRESH_INTERVAL = 30.0
+_last_emotion: dict[str, tuple[str, str, float]] = {}
+
+
 async def send_emotion_data(room: rtc.Room, emotion: str, source: str, text: str):
     """Send emotion data to the frontend via participant attributes."""
+    # Slice the snippet once; logging truncates lazily with %.50s
+    snippet = text[:100]
+
+    # Skip the signalling round-trip when nothing changed
+    now = time.monotonic()
+    last = _last_emotion.get(room.name)
+    if (
+        last is not None
+        and last[:2] == (emotion, snippet)
+        and now - last[2] < EMOTION_REFRESH_INTERVAL
+    ):
+        logger.debug("Emotion unchanged, skipping attribute update: %s", emotion)
+        return
+
     data = {
         "type": "emotion",
         "emotion": emotion,
         "source": source,  # "user" or "agent"
-        "text": text[:100],  # Send snippet of text for debugging
+        "text": snippet,  # Send snippet of text for debugging
         # Send timestamp in milliseconds (JS Date expects ms)
-        "timestamp": int(time.time() * 1000),
+        "timestamp": time.time_ns() // 1_000_000,
         "confidence": 1.0,  # Add confidence field
     }
 
     # Send via participant attributes (not data channel)
-    emotion_json = json.dumps(data)
+    emotion_json = dumps_json(data)
     await room.local_participant.set_attributes({"emotion": emotion_json})
-    logger.info(f"📤 Sent emotion via attributes: {emotion} ({source}) - {text[:50]}")
+    _last_emotion[room.name] = (emotion, snippet, now)
+    logger.info("📤 Sent emotion via attributes: %s (%s) - %.50s", emotion, source, snippet)
 
 
 @server.rtc_session()
@@ -101,6 +133,54 @@ async def my_agent(ctx: JobContext):
     # Set up emotion analysis hooks
     logger.info("Setting up emotion analysis hooks...")
 
+    # Emotions are sent in order by one long-lived task fed from a small queue,
+    # instead of allocating a task per conversation item
+    emotion_queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+
+    async def emotion_sender():
+        while True:
+            emotion, source, text, text_lower = await emotion_queue.get()
+            try:
+                if emotion is None:
+                    # Sentiment analysis runs off the event loop
+                    emotion = await analyze_emotion_lower_async(text_lower)
+                    logger.info("🎭 Agent's emotion (from response): %s", emotion)
+                await send_emotion_data(ctx.room, emotion, source, text)
+            except Exception:
+                logger.exception("❌ Failed to send emotion")
+
+    def queue_emotion(
+        emotion: Optional[str], source: str, text: str, text_lower: str = ""
+    ):
+        """
+        Queue an emotion for the sender task.
+
+        Pass emotion=None to have the sender analyze text_lower first. Such a
+        sentiment item replaces any still-pending one, so a burst of messages
+        is only analyzed for the latest; explicit emotions are never dropped
+        in its favour.
+        """
+        if emotion is None:
+            pending = []
+            while not emotion_queue.empty():
+                item = emotion_queue.get_nowait()
+                if item[0] is not None:
+                    pending.append(item)
+            for item in pending:
+                emotion_queue.put_nowait(item)
+
+        if emotion_queue.full():
+            emotion_queue.get_nowait()  # Drop the oldest
+        emotion_queue.put_nowait((emotion, source, text, text_lower))
+
+    emotion_sender_task = asyncio.create_task(emotion_sender())
+
+    async def stop_emotion_sender():
+        emotion_sender_task.cancel()
+        _last_emotion.pop(ctx.room.name, None)
+
+    ctx.add_shutdown_callback(stop_emotion_sender)
+
     @session.on("conversation_item_added")
     def on_conversation_item(event):
         """Handle new conversation items - analyze agent's responses to determine emotion."""
@@ -119,14 +199,12 @@ async def my_agent(ctx: JobContext):
         else:
             transcript = str(content)
 
-        logger.info(f"🎭 {'USER' if role == 'user' else 'AGENT'} said: {transcript[:50]}")
+        logger.info("🎭 %s said: %.50s", "USER" if role == "user" else "AGENT", transcript)
 
         # ANALYZE AGENT'S RESPONSES - this is what we want to show emotion for
         if role == "assistant" and transcript.strip():
-            emotion = analyze_emotion(transcript)
-            logger.info(f"🎭 Agent's emotion (from response): {emotion}")
-            # Send emotion as 'agent' source with AGENT'S text
-            asyncio.create_task(send_emotion_data(ctx.room, emotion, "agent", transcript))
+            # Send emotion as 'agent' source with AGENT'S text (analyzed off-loop)
+            queue_emotion(None, "agent", transcript, transcript.lower())
 
     logger.info("✅ Emotion hooks registered")
 
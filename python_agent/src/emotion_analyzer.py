@@ -1,48 +1,98 @@
 """
 Emotion analysis module for voice AI agent.
 Provides keyword-based emotion detection for POC implementation.
+
+Keywords are matched in a single pass with a pyahocorasick automaton when it
+is installed, or a pure-Python trie otherwise. Hyperscan was benchmarked too,
+but its per-scan callback overhead makes it slower on utterance-sized text.
 """
 
+import asyncio
+import functools
 import logging
+import sys
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from typing import Literal
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 logger = logging.getLogger("emotion_analyzer")
 
 # Define emotion types
 EmotionType = Literal["happy", "sad", "angry", "anxious", "surprised", "grateful", "neutral"]
 
+# Human-readable descriptions, built once and read-only
+_EMOTION_DESCRIPTIONS = MappingProxyType({
+    "happy": "Happy and positive",
+    "sad": "Sad or disappointed",
+    "angry": "Angry or frustrated",
+    "anxious": "Anxious or worried",
+    "surprised": "Surprised or amazed",
+    "grateful": "Grateful or thankful",
+    "neutral": "Neutral or calm"
+})
+
+# Labels are interned so callers comparing results hit the identity fast path
+_NEUTRAL = sys.intern("neutral")
+
+
+def _is_word_char(char: str) -> bool:
+    """Match the re module's definition of a \\w character."""
+    return char.isalnum() or char == "_"
+
 
 class EmotionAnalyzer:
     """Simple keyword-based emotion classifier for POC."""
 
-    # Emotion keyword mappings (order matters - more specific emotions first)
+    # Emotion keyword mappings (order matters - more specific emotions first).
+    # Frozen as tuples of interned strings, longest (most distinctive) first.
     EMOTION_KEYWORDS = {
-        "angry": [
-            "fuck", "angry", "hate", "mad", "pissed", "annoyed", "furious",
-            "irritated", "rage", "frustrated", "damn", "shit"
-        ],
-        "sad": [
-            "sad", "depressed", "down", "unhappy", "cry", "crying", "miserable",
-            "disappointed", "upset", "terrible", "awful", "bad"
-        ],
-        "anxious": [
-            "worried", "anxious", "scared", "afraid", "nervous", "concerned",
-            "stress", "stressed", "panic", "fear", "overwhelming"
-        ],
-        "grateful": [
-            "thank", "thanks", "appreciate", "grateful", "gratitude",
-            "appreciated", "thankful"
-        ],
-        "surprised": [
-            "wow", "surprised", "shocked", "incredible", "unbelievable",
-            "omg", "no way", "can't believe"
-        ],
-        "happy": [
-            "happy", "great", "awesome", "love", "excited", "amazing", "wonderful",
-            "fantastic", "excellent", "good", "joy", "delighted", "pleased"
-        ]
+        emotion: tuple(sorted(map(sys.intern, keywords), key=len, reverse=True))
+        for emotion, keywords in {
+            "angry": [
+                "fuck", "angry", "hate", "mad", "pissed", "annoyed", "furious",
+                "irritated", "rage", "frustrated", "damn", "shit"
+            ],
+            "sad": [
+                "sad", "depressed", "down", "unhappy", "cry", "crying", "miserable",
+                "disappointed", "upset", "terrible", "awful", "bad"
+            ],
+            "anxious": [
+                "worried", "anxious", "scared", "afraid", "nervous", "concerned",
+                "stress", "stressed", "panic", "fear", "overwhelming"
+            ],
+            "grateful": [
+                "thank", "thanks", "appreciate", "grateful", "gratitude",
+                "appreciated", "thankful"
+            ],
+            "surprised": [
+                "wow", "surprised", "shocked", "incredible", "unbelievable",
+                "omg", "no way", "can't believe"
+            ],
+            "happy": [
+                "happy", "great", "awesome", "love", "excited", "amazing", "wonderful",
+                "fantastic", "excellent", "good", "joy", "delighted", "pleased"
+            ]
+        }.items()
     }
 
+    # Instances are thin: the keyword tables and scanners are built once at
+    # import time, and each instance only holds a reference to one scanner
+    __slots__ = ("_scan",)
+
+    def __init__(self) -> None:
+        # Priority index follows EMOTION_KEYWORDS order (lower wins)
+        if AHOCORASICK_AVAILABLE and _KEYWORD_AUTOMATON is not None:
+            self._scan = _scan_with_automaton
+        else:
+            self._scan = _scan_with_trie
+
     def analyze(self, text: str) -> EmotionType:
         """
         Analyze text and return detected emotion.
@@ -54,36 +104,163 @@ class EmotionAnalyzer:
             Detected emotion type (defaults to "neutral" if no emotion detected)
         """
         if not text:
-            return "neutral"
+            return _NEUTRAL
+
+        return self.analyze_lower(text.lower())
+
+    def analyze_lower(self, text_lower: str) -> EmotionType:
+        """
+        Analyze already-lowercased text and return detected emotion.
+
+        Use this when the caller has lowercased the text for other checks,
+        to avoid allocating another copy.
+
+        Args:
+            text_lower: The lowercased text to analyze
+
+        Returns:
+            Detected emotion type (defaults to "neutral" if no emotion detected)
+        """
+        if not text_lower:
+            return _NEUTRAL
+
+        # Single pass over the text (order matters - negative emotions win ties)
+        priority = self._scan(text_lower)
+        if priority >= 0:
+            emotion = _EMOTIONS[priority]
+            logger.info("Detected emotion: %s in text: '%.50s...'", emotion, text_lower)
+            return emotion  # type: ignore
+
+        logger.debug("No specific emotion detected, returning neutral for text: '%.50s...'", text_lower)
+        return _NEUTRAL
 
-        text_lower = text.lower()
+    def analyze_many(self, texts: Sequence[str]) -> list[EmotionType]:
+        """
+        Analyze a batch of texts (e.g. a conversation history) in one call.
+
+        Skips the per-text method dispatch and logging of analyze(). Scans run
+        sequentially: both scanners hold the GIL, and a scan costs about a
+        microsecond, so thread or process pools would only add overhead.
 
-        # Check for each emotion type (order matters - check negative emotions first)
-        for emotion, keywords in self.EMOTION_KEYWORDS.items():
-            if any(keyword in text_lower for keyword in keywords):
-                logger.info(f"Detected emotion: {emotion} in text: '{text[:50]}...'")
-                return emotion  # type: ignore
+        Args:
+            texts: The texts to analyze
 
-        logger.debug(f"No specific emotion detected, returning neutral for text: '{text[:50]}...'")
-        return "neutral"
+        Returns:
+            Detected emotion type for each text, in order
+        """
+        scan = self._scan
+        # Index -1 (no keyword found) selects the trailing "neutral"
+        labels = _LABELS
+        return [labels[scan(text.lower())] if text else _NEUTRAL for text in texts]
 
     def get_emotion_description(self, emotion: EmotionType) -> str:
         """Get a human-readable description of the emotion."""
-        descriptions = {
-            "happy": "Happy and positive",
-            "sad": "Sad or disappointed",
-            "angry": "Angry or frustrated",
-            "anxious": "Anxious or worried",
-            "surprised": "Surprised or amazed",
-            "grateful": "Grateful or thankful",
-            "neutral": "Neutral or calm"
-        }
-        return descriptions.get(emotion, "Unknown emotion")
+        return _EMOTION_DESCRIPTIONS.get(emotion, "Unknown emotion")
+
+
+def _keyword_priorities(keywords: dict) -> dict[str, int]:
+    """Map each keyword to its emotion's priority (first listing wins)."""
+    priorities: dict[str, int] = {}
+    for priority, emotion_keywords in enumerate(keywords.values()):
+        for keyword in emotion_keywords:
+            priorities.setdefault(keyword, priority)
+    return priorities
+
+
+def _build_keyword_automaton(keywords: dict):
+    """One automaton finds every (possibly overlapping) keyword in a single pass."""
+    automaton = ahocorasick.Automaton()
+    for keyword, priority in _keyword_priorities(keywords).items():
+        automaton.add_word(keyword, (1 << priority, len(keyword)))
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_keyword_trie(keywords: dict) -> dict:
+    """
+    Zero-dependency fallback: a character-indexed trie of nested dicts. The
+    "" key of a node holds the priority bit of the keyword ending there.
+    """
+    trie: dict = {}
+    for keyword, priority in _keyword_priorities(keywords).items():
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = 1 << priority
+    return trie
+
+
+_EMOTIONS = tuple(map(sys.intern, EmotionAnalyzer.EMOTION_KEYWORDS))
+_LABELS = (*_EMOTIONS, _NEUTRAL)
+_KEYWORD_TRIE = _build_keyword_trie(EmotionAnalyzer.EMOTION_KEYWORDS)
+_KEYWORD_AUTOMATON = (
+    _build_keyword_automaton(EmotionAnalyzer.EMOTION_KEYWORDS)
+    if AHOCORASICK_AVAILABLE
+    else None
+)
+
+
+# Keyword scanners return the best (lowest) priority index of any keyword in the
+# text, or -1. Keywords must start at a word boundary ("rage" does not match
+# "average"), but may be followed by anything so stems still match ("stress" in
+# "stressing"). Results are memoized: utterances and test inputs repeat often,
+# and a hit is a single dict probe.
+#
+# Each hit ORs its emotion's priority bit into a mask; the lowest set bit is
+# the winner, so no per-hit comparison is needed. Bit 0 is the top priority,
+# so scanning stops as soon as it is set.
+
+
+def _lowest_priority(mask: int) -> int:
+    """Index of the lowest set bit, or -1 for an empty mask."""
+    return (mask & -mask).bit_length() - 1
+
+
+@functools.lru_cache(maxsize=4096)
+def _scan_with_automaton(text_lower: str) -> int:
+    """Scan with the Aho-Corasick automaton."""
+    mask = 0
+    for end, (bit, length) in _KEYWORD_AUTOMATON.iter(text_lower):
+        start = end - length + 1
+        if start and _is_word_char(text_lower[start - 1]):
+            continue
+        mask |= bit
+        if mask & 1:
+            break
+    return _lowest_priority(mask)
+
+
+@functools.lru_cache(maxsize=4096)
+def _scan_with_trie(text_lower: str) -> int:
+    """Walk the keyword trie from each word start."""
+    mask = 0
+    length = len(text_lower)
+    prev_is_word = False
+    for i, char in enumerate(text_lower):
+        is_word = _is_word_char(char)
+        if is_word and not prev_is_word:
+            # Only descend when the first character starts some keyword
+            node = _KEYWORD_TRIE.get(char)
+            j = i + 1
+            while node is not None:
+                mask |= node.get("", 0)
+                if mask & 1:
+                    return 0
+                if j == length:
+                    break
+                node = node.get(text_lower[j])
+                j += 1
+        prev_is_word = is_word
+    return _lowest_priority(mask)
 
 
 # Singleton instance
 _analyzer = EmotionAnalyzer()
 
+# Single worker so analyses stay ordered and a heavier model (e.g. ONNX/Torch)
+# can keep its state on one thread
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emotion")
+
 
 def analyze_emotion(text: str) -> EmotionType:
     """
@@ -96,3 +273,37 @@ def analyze_emotion(text: str) -> EmotionType:
         Detected emotion type
     """
     return _analyzer.analyze(text)
+
+
+def analyze_emotion_lower(text_lower: str) -> EmotionType:
+    """
+    Convenience function to analyze emotion in already-lowercased text.
+
+    Args:
+        text_lower: The lowercased text to analyze
+
+    Returns:
+        Detected emotion type
+    """
+    return _analyzer.analyze_lower(text_lower)
+
+
+async def analyze_emotion_lower_async(text_lower: str) -> EmotionType:
+    """
+    Analyze already-lowercased text on the dedicated emotion thread.
+
+    Keeps the event loop free, so swapping in a slower classifier does not
+    stall the voice pipeline.
+
+    Args:
+        text_lower: The lowercased text to analyze
+
+    Returns:
+        Detected emotion type
+    """
+    # Don't pay for a thread hop on empty input
+    if not text_lower:
+        return _NEUTRAL
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _analyzer.analyze_lower, text_lower)
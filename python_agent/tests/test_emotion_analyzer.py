@@ -2,7 +2,13 @@
 
 import pytest
 
-from emotion_analyzer import EmotionAnalyzer, analyze_emotion
+import emotion_analyzer
+from emotion_analyzer import (
+    EmotionAnalyzer,
+    analyze_emotion,
+    analyze_emotion_lower,
+    analyze_emotion_lower_async,
+)
 
 
 class TestEmotionAnalyzer:
@@ -68,6 +74,56 @@ class TestEmotionAnalyzer:
         text = "I'm angry but also a bit sad"
         assert self.analyzer.analyze(text) == "angry"
 
+    def test_priority_does_not_depend_on_position(self):
+        """Test that priority wins over which keyword appears first in the text."""
+        assert self.analyzer.analyze("I'm a bit sad but mostly angry") == "angry"
+        assert self.analyzer.analyze("Great news, but I'm worried") == "anxious"
+
+    def test_overlapping_keywords_use_priority(self):
+        """Test that a higher-priority keyword wins even when it overlaps another."""
+        # "bad" (sad) and "mad" (angry) both appear; angry has priority
+        assert self.analyzer.analyze("bad, mad") == "angry"
+        assert self.analyzer.analyze("no way, I'm mad") == "angry"
+
+    def test_trie_fallback_without_ahocorasick(self, monkeypatch):
+        """Test that the trie fallback agrees with the automaton."""
+        monkeypatch.setattr(emotion_analyzer, "AHOCORASICK_AVAILABLE", False)
+        fallback = EmotionAnalyzer()
+
+        for text in ["I'm angry but also a bit sad", "bad, mad", "Wow!", "average"]:
+            assert fallback.analyze(text) == self.analyzer.analyze(text)
+
+    @pytest.mark.parametrize("text", [
+        "Whatever works for you",
+        "The average storage cost",
+        "Grab some courage",
+    ])
+    def test_keywords_inside_words_are_ignored(self, text):
+        """Test that keywords only match at the start of a word."""
+        assert self.analyzer.analyze(text) == "neutral"
+
+    def test_repeated_text_is_cached(self):
+        """Test that scanning the same text twice is served from the cache."""
+        scan = self.analyzer._scan
+        scan.cache_clear()
+        self.analyzer.analyze("I'M SO HAPPY!")
+        self.analyzer.analyze("i'm so happy!")
+        assert scan.cache_info().hits == 1
+
+    def test_analyze_many(self):
+        """Test batch analysis matches per-text analysis and keeps order."""
+        texts = [
+            "I'm so happy and excited about this!",
+            "",
+            None,
+            "The meeting is scheduled for tomorrow at 3pm",
+            "I'm angry but also a bit sad",
+        ]
+        assert self.analyzer.analyze_many(texts) == [
+            self.analyzer.analyze(text) for text in texts
+        ]
+        assert self.analyzer.analyze_many([]) == []
+
     def test_get_emotion_description(self):
         """Test emotion descriptions."""
         assert "Happy" in self.analyzer.get_emotion_description("happy")
@@ -80,6 +136,16 @@ class TestEmotionAnalyzer:
         text = "I'm so grateful for your help!"
         assert analyze_emotion(text) == "grateful"
 
+    def test_analyze_emotion_lower_convenience_function(self):
+        """Test the pre-lowercased variant of the convenience function."""
+        assert analyze_emotion_lower("i'm so grateful for your help!") == "grateful"
+        assert analyze_emotion_lower("") == "neutral"
+
+    async def test_analyze_emotion_lower_async(self):
+        """Test the off-loop variant of the convenience function."""
+        assert await analyze_emotion_lower_async("i'm so happy!") == "happy"
+        assert await analyze_emotion_lower_async("") == "neutral"
+
 
 class TestEmotionKeywords:
     """Test specific keyword detection."""
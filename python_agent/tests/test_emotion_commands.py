@@ -0,0 +1,40 @@
+"""Tests for explicit emotion command detection."""
+
+import pytest
+
+from agent import detect_emotion_command
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("can you act happy for me", "happy"),
+        ("please be sad", "sad"),
+        ("show surprised now", "surprised"),
+        ("act thinking", "idle"),
+        ("reset", "neutral"),
+        ("tell me about the weather", None),
+        ("load the preset", None),  # 'reset' only matches as a whole word
+    ],
+)
+def test_detect_emotion_command(text, expected):
+    """Each command phrase maps to its emotion."""
+    assert detect_emotion_command(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "don't be sad, be happy",
+        "reset and act happy",
+        "act angry, no wait, show happy",
+    ],
+)
+def test_earlier_emotion_wins_regardless_of_position(text):
+    """Commands follow EMOTION_COMMANDS order, not their position in the text."""
+    assert detect_emotion_command(text) == "happy"
+
+
+def test_later_command_can_outrank_earlier_one():
+    """A higher-priority command later in the text beats a lower one before it."""
+    assert detect_emotion_command("reset, then be angry") == "angry"
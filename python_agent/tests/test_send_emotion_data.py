@@ -0,0 +1,49 @@
+"""Tests for emotion attribute deduplication in send_emotion_data."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import agent
+
+
+class FakeParticipant:
+    """Records every attribute update instead of talking to LiveKit."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def set_attributes(self, attributes):
+        self.sent.append(json.loads(attributes["emotion"]))
+
+
+@pytest.fixture
+def room(monkeypatch):
+    monkeypatch.setattr(agent, "_last_emotion", {})
+    return SimpleNamespace(name="test-room", local_participant=FakeParticipant())
+
+
+async def test_identical_payload_is_skipped(room):
+    """The same emotion and text inside the refresh interval is sent once."""
+    await agent.send_emotion_data(room, "happy", "agent", "great news")
+    await agent.send_emotion_data(room, "happy", "agent", "great news")
+    assert len(room.local_participant.sent) == 1
+
+
+async def test_same_emotion_with_new_text_is_sent(room):
+    """The frontend classifies the text itself, so new text is always sent."""
+    await agent.send_emotion_data(room, "neutral", "agent", "tell me a joke")
+    await agent.send_emotion_data(room, "neutral", "agent", "that's amazing!")
+    assert [d["text"] for d in room.local_participant.sent] == [
+        "tell me a joke",
+        "that's amazing!",
+    ]
+
+
+async def test_identical_payload_is_resent_after_refresh_interval(room, monkeypatch):
+    """Unchanged emotions are refreshed for late-joining clients."""
+    monkeypatch.setattr(agent, "EMOTION_REFRESH_INTERVAL", 0.0)
+    await agent.send_emotion_data(room, "sad", "agent", "oh no")
+    await agent.send_emotion_data(room, "sad", "agent", "oh no")
+    assert len(room.local_participant.sent) == 2